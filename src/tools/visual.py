@@ -2,12 +2,215 @@
 """
 Visual tools for chart generation and image creation.
 """
-from typing import Optional, List, Dict, Any, Union
-import altair as alt
-import base64
-import io
-import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Optional, List, Dict, Any, Iterable, Literal, Set, Union
+import asyncio
+import binascii
+import functools
+import hashlib
+import itertools
+import orjson
 import os
+import re
+import threading
+import vl_convert as vlc
+from loguru import logger
+from src.utils.bedrock import get_bedrock_client
+
+# Generated images land here; created once at import
+OUTPUT_DIR = "outputs"
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Above this many rows, only the encoded columns are inlined into the spec
+LARGE_DATA_THRESHOLD = 5000
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Byte offset of the colour type in the IHDR chunk; type 2 is truecolour RGB
+PNG_COLOR_TYPE_OFFSET = 25
+PNG_COLOR_TYPE_RGB = 2
+
+# Multiple of 4 so every base64 slice decodes on its own
+B64_CHUNK_SIZE = 64 * 1024
+
+# Leading YYYY-MM-DD marks an x field as temporal
+ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Filled into render_vega_lite_png specs that leave them out
+RAW_SPEC_DEFAULTS = {
+    "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+    "width": 400,
+    "height": 300
+}
+
+IMAGE_MIME_TYPES = {"svg": "image/svg+xml", "png": "image/png"}
+
+# Rendered charts kept for repeat requests, keyed by spec hash and format
+RENDER_CACHE_SIZE = 64
+
+# Color names accepted in create_chart's color_scheme
+COLOR_MAP = {
+    "blue": "#1f77b4",
+    "orange": "#ff7f0e",
+    "green": "#2ca02c",
+    "red": "#d62728",
+    "purple": "#9467bd",
+    "brown": "#8c564b",
+    "pink": "#e377c2",
+    "gray": "#7f7f7f",
+    "grey": "#7f7f7f"
+}
+
+
+# Minimal chart rendered once at import so vl-convert's cold start is off the first tool call
+WARMUP_SPEC = {
+    "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+    "data": {"values": [{"a": 1, "b": 1}]},
+    "mark": "bar",
+    "encoding": {
+        "x": {"field": "a", "type": "quantitative"},
+        "y": {"field": "b", "type": "quantitative"}
+    }
+}
+
+
+def _warm_up_renderer() -> None:
+    """Render WARMUP_SPEC to initialise vl-convert's runtime and fonts."""
+    try:
+        vlc.vegalite_to_png(vl_spec=WARMUP_SPEC)
+    except Exception:
+        pass
+
+
+threading.Thread(target=_warm_up_renderer, name="vl-convert-warmup", daemon=True).start()
+
+
+def _is_rgb_png(head: bytes) -> bool:
+    """Return True if the leading bytes are a PNG header declaring an RGB image."""
+    return (
+        head.startswith(PNG_SIGNATURE)
+        and len(head) > PNG_COLOR_TYPE_OFFSET
+        and head[PNG_COLOR_TYPE_OFFSET] == PNG_COLOR_TYPE_RGB
+    )
+
+
+def _write_chunks(path: str, chunks: Iterable[bytes]) -> None:
+    """Write byte chunks to path on a raw fd, bypassing Python's buffered file object."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        for chunk in chunks:
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _first_image_b64(raw: bytes) -> Union[memoryview, str]:
+    """
+    Return the first base64 image of a Titan response body.
+
+    The field is sliced out of the raw bytes so the multi-MB payload is never
+    copied into a Python str. Anything the slice can't take verbatim (an
+    "images" value that isn't an array, an empty array, or an escaped
+    string) goes through orjson.
+    """
+    def skip_ws(i: int) -> int:
+        while raw[i:i + 1].isspace():
+            i += 1
+        return i
+
+    key = raw.find(b'"images"')
+    if key != -1:
+        # The key must be followed by ':' and '[', so the array is its value
+        colon = skip_ws(key + len(b'"images"'))
+        bracket = skip_ws(colon + 1) if raw[colon:colon + 1] == b":" else -1
+        if bracket != -1 and raw[bracket:bracket + 1] == b"[":
+            start = skip_ws(bracket + 1)
+            if raw[start:start + 1] == b'"':
+                start += 1
+                end = raw.find(b'"', start)
+                if end != -1 and raw.find(b"\\", start, end) == -1:
+                    return memoryview(raw)[start:end]
+    return orjson.loads(raw)["images"][0]
+
+
+class ChartSpecError(ValueError):
+    """Raised when create_chart arguments cannot produce a chart."""
+    pass
+
+
+_render_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+
+def _render_chart(spec: Dict[str, Any], output_format: str) -> bytes:
+    """Render a Vega-Lite spec to file bytes; SVG skips rasterization entirely."""
+    key = hashlib.blake2b(
+        orjson.dumps(spec, option=orjson.OPT_SORT_KEYS) + output_format.encode(),
+        digest_size=16
+    ).hexdigest()
+    with _render_cache_lock:
+        if key in _render_cache:
+            _render_cache.move_to_end(key)
+            return _render_cache[key]
+
+    if output_format == "svg":
+        image = vlc.vegalite_to_svg(vl_spec=spec).encode("utf-8")
+    else:
+        image = vlc.vegalite_to_png(vl_spec=spec)
+
+    with _render_cache_lock:
+        _render_cache[key] = image
+        if len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return image
+
+
+# Strong references to fire-and-forget send tasks scheduled from sync code
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _send_image_async(content: bytes, name: str, output_format: str) -> None:
+    """Post in-memory image bytes inline in the current Chainlit chat."""
+    import chainlit as cl
+
+    # Chainlit sniffs content to pick a MIME type, which does not recognise SVG
+    image_element = cl.Image(
+        content=content, name=name, display="inline", mime=IMAGE_MIME_TYPES[output_format]
+    )
+    await cl.Message(content="", elements=[image_element]).send()
+
+
+def _send_image(content: bytes, name: str, output_format: str) -> None:
+    """
+    Send an image to the chat from synchronous tool code.
+    Schedules on the running loop when there is one, otherwise runs it to completion.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(_send_image_async(content, name, output_format))
+    else:
+        # The loop only holds weak references to tasks; keep one until it finishes
+        task = loop.create_task(_send_image_async(content, name, output_format))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+@functools.lru_cache(maxsize=4)
+def _titan_latency_mode(value: str) -> Optional[str]:
+    """Validate a BEDROCK_PERFORMANCE_CONFIG value; warns once per bad value and ignores it."""
+    mode = value.strip().lower()
+    if mode in ("standard", "optimized"):
+        return mode
+    if mode:
+        logger.warning(
+            "Ignoring BEDROCK_PERFORMANCE_CONFIG={!r}; expected 'standard' or 'optimized'", value
+        )
+    return None
 
 
 def titan_image_generate(
@@ -21,13 +224,13 @@ def titan_image_generate(
     """
     Generate an image with Amazon Titan Image Generator v2.
     Returns the local file path to the PNG.
-    """
-    import boto3
-    from PIL import Image
 
+    Bedrock's latency mode ("standard" or "optimized") is taken from the
+    BEDROCK_PERFORMANCE_CONFIG environment variable, never from the caller.
+    """
     region = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1"
     model_id = "amazon.titan-image-generator-v2:0"
-    br = boto3.client("bedrock-runtime", region_name=region)
+    br = get_bedrock_client(region)
 
     body = {
         "taskType": "TEXT_IMAGE",
@@ -44,20 +247,36 @@ def titan_image_generate(
         }
     }
 
-    resp = br.invoke_model(modelId=model_id, body=json.dumps(body))
-    payload = json.loads(resp["body"].read())
-    b64 = payload["images"][0]
-    img_bytes = base64.b64decode(b64)
-    img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    invoke_kwargs = {}
+    performance_config = _titan_latency_mode(os.getenv("BEDROCK_PERFORMANCE_CONFIG", ""))
+    if performance_config:
+        invoke_kwargs["performanceConfigLatency"] = performance_config
+
+    resp = br.invoke_model(modelId=model_id, body=orjson.dumps(body), **invoke_kwargs)
+    b64 = _first_image_b64(resp["body"].read())
+
+    out_path = os.path.join(OUTPUT_DIR, "titan_image.png")
 
-    out_dir = "outputs"
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, "titan_image.png")
-    img.save(out_path, format="PNG")
+    # Decode straight to disk slice by slice instead of holding the whole image
+    head = binascii.a2b_base64(b64[:B64_CHUNK_SIZE])
+    rest = (
+        binascii.a2b_base64(b64[start:start + B64_CHUNK_SIZE])
+        for start in range(B64_CHUNK_SIZE, len(b64), B64_CHUNK_SIZE)
+    )
+    _write_chunks(out_path, itertools.chain((head,), rest))
+
+    # Titan returns RGB PNG; anything else is normalised in place from the written file
+    if not _is_rgb_png(head):
+        from PIL import Image
+        with Image.open(out_path) as img:
+            img.load()
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img.save(out_path, format="PNG")
     return out_path
 
 
-def create_chart(
+def build_chart_spec(
     chart_type: str,
     data: List[Dict[str, Any]],
     x_field: str,
@@ -69,6 +288,158 @@ def create_chart(
     color_scheme: Optional[Dict[str, str]] = None,
     width: int = 500,
     height: int = 300
+) -> Dict[str, Any]:
+    """
+    Build the Vega-Lite spec behind create_chart.
+
+    Raises:
+        ChartSpecError: If there is no data or the chart type is unknown.
+    """
+    from datetime import datetime
+    
+    if not data:
+        raise ChartSpecError("Error: No data provided for chart")
+    
+    # Detect if x_field contains dates
+    is_temporal = ISO_DATE_RE.match(str(data[0].get(x_field, ""))) is not None
+    
+    # For temporal data, convert to month labels
+    if is_temporal:
+        # Cost Explorer rows usually arrive date-ordered; only sort when they don't
+        sort_key = itemgetter(x_field)
+        xs = [sort_key(item) for item in data]
+        if any(a > b for a, b in zip(xs, xs[1:])):
+            data = sorted(data, key=sort_key)
+        fromisoformat = datetime.fromisoformat
+        labels = []
+        for item in data:
+            date_str = item[x_field]
+            try:
+                labels.append(fromisoformat(date_str[:10]).strftime("%b %Y"))
+            except:
+                labels.append(date_str)
+        
+        unique_months = list(dict.fromkeys(labels))
+        # Project new rows rather than writing labels into the caller's dicts
+        data = [{**item, "_month_label": label} for item, label in zip(data, labels)]
+        
+        x_field_display = "_month_label"
+    else:
+        x_field_display = x_field
+        unique_months = None
+    
+    if chart_type == "pie":
+        mark = {"type": "arc", "innerRadius": 50}
+        encoding = {
+            "theta": {"field": y_field, "type": "quantitative"},
+            "color": {
+                "field": x_field_display,
+                "type": "nominal",
+                "title": x_title or x_field.replace("_", " ").title()
+            }
+        }
+    
+    elif color_field and color_scheme:
+        domain = list(color_scheme)
+        range_colors = [COLOR_MAP.get(c.lower(), c) for c in color_scheme.values()]
+        
+        encoding = {
+            "x": {
+                "field": x_field_display,
+                "type": "nominal",
+                "title": x_title or "Date",
+                "sort": unique_months if unique_months else None,
+                "axis": {"labelAngle": -45}
+            },
+            "y": {
+                "field": y_field,
+                "type": "quantitative",
+                "title": y_title or y_field.replace("_", " ").title(),
+                "scale": {"zero": True}
+            },
+            "color": {
+                "field": color_field,
+                "type": "nominal",
+                "title": color_field.replace("_", " ").title(),
+                "scale": {"domain": domain, "range": range_colors}
+            }
+        }
+        
+        if chart_type == "line":
+            stroke_dash_range = [[5, 5] if k == "Forecast" else [1, 0] for k in domain]
+            mark = {"type": "line", "point": True, "strokeWidth": 2}
+            encoding["strokeDash"] = {
+                "field": color_field,
+                "type": "nominal",
+                "scale": {"domain": domain, "range": stroke_dash_range},
+                "legend": None
+            }
+        elif chart_type == "bar":
+            mark = {"type": "bar"}
+            encoding["xOffset"] = {"field": color_field, "type": "nominal"}
+        elif chart_type == "area":
+            mark = {"type": "area", "line": True, "point": True, "opacity": 0.5}
+        else:
+            raise ChartSpecError(f"Unknown chart type: {chart_type}")
+    
+    else:
+        encoding = {
+            "x": {
+                "field": x_field_display,
+                "type": "nominal",
+                "title": x_title or x_field.replace("_", " ").title(),
+                "sort": unique_months if unique_months else ("-y" if chart_type == "bar" else None),
+                "axis": {"labelAngle": -45} if is_temporal else {}
+            },
+            "y": {
+                "field": y_field,
+                "type": "quantitative",
+                "title": y_title or y_field.replace("_", " ").title(),
+                "scale": {"zero": True}
+            }
+        }
+        
+        if chart_type == "bar":
+            mark = {"type": "bar"}
+            encoding["color"] = {"field": x_field_display, "type": "nominal", "legend": None}
+        elif chart_type == "line":
+            mark = {"type": "line", "point": True, "strokeWidth": 2}
+        elif chart_type == "area":
+            mark = {"type": "area", "line": True, "point": True}
+        else:
+            raise ChartSpecError(f"Unknown chart type: {chart_type}. Use: bar, line, pie, area")
+    
+    # Large inputs: drop columns the chart never reads before inlining them
+    if len(data) > LARGE_DATA_THRESHOLD:
+        fields = {x_field_display, y_field}
+        if color_field:
+            fields.add(color_field)
+        data = [{k: item[k] for k in fields if k in item} for item in data]
+    
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data": {"values": data},
+        "mark": mark,
+        "encoding": encoding,
+        "width": width,
+        "height": height,
+        "title": title
+    }
+
+
+def create_chart(
+    chart_type: str,
+    data: List[Dict[str, Any]],
+    x_field: str,
+    y_field: str,
+    title: str = "Chart",
+    color_field: Optional[str] = None,
+    x_title: Optional[str] = None,
+    y_title: Optional[str] = None,
+    color_scheme: Optional[Dict[str, str]] = None,
+    width: int = 500,
+    height: int = 300,
+    output_format: Literal["svg", "png"] = "svg"
 ) -> str:
     """
     Create a chart with simple parameters. The tool handles all complexity.
@@ -85,228 +456,141 @@ def create_chart(
         color_scheme: Optional color mapping like {"Actual": "blue", "Forecast": "orange"}
         width: Chart width in pixels
         height: Chart height in pixels
+        output_format: "svg" for in-chat display, "png" when a raster export is needed
     
     Returns:
         Success message if chart created, error message otherwise.
     """
-    import chainlit as cl
-    import asyncio
-    from datetime import datetime
-    
     try:
-        if not data:
-            return "Error: No data provided for chart"
-        
-        # Detect if x_field contains dates
-        is_temporal = False
-        sample_value = str(data[0].get(x_field, ""))
-        if len(sample_value) >= 10 and sample_value[4:5] == "-" and sample_value[7:8] == "-":
-            is_temporal = True
-        
-        # For temporal data, convert to month labels
-        if is_temporal:
-            data = sorted(data, key=lambda x: x[x_field])
-            for item in data:
-                date_str = item[x_field]
-                try:
-                    dt = datetime.strptime(date_str[:10], "%Y-%m-%d")
-                    item["_month_label"] = dt.strftime("%b %Y")
-                    item["_sort_key"] = date_str[:10]
-                except:
-                    item["_month_label"] = date_str
-                    item["_sort_key"] = date_str
-            
-            unique_months = []
-            seen = set()
-            for item in data:
-                label = item["_month_label"]
-                if label not in seen:
-                    unique_months.append(label)
-                    seen.add(label)
-            
-            x_field_display = "_month_label"
-        else:
-            x_field_display = x_field
-            unique_months = None
-        
-        # Color mapping
-        color_map = {
-            "blue": "#1f77b4",
-            "orange": "#ff7f0e",
-            "green": "#2ca02c",
-            "red": "#d62728",
-            "purple": "#9467bd",
-            "brown": "#8c564b",
-            "pink": "#e377c2",
-            "gray": "#7f7f7f",
-            "grey": "#7f7f7f"
+        spec = build_chart_spec(
+            chart_type, data, x_field, y_field, title, color_field,
+            x_title, y_title, color_scheme, width, height
+        )
+        _send_image(_render_chart(spec, output_format), title, output_format)
+        return _chart_created(title)
+    except Exception as e:
+        return _chart_error(e)
+
+
+def create_charts(
+    charts: List[Dict[str, Any]],
+    output_format: Literal["svg", "png"] = "svg"
+) -> List[str]:
+    """
+    Create several charts in one call, rendering them in parallel.
+    
+    Args:
+        charts: One dict of create_chart arguments per chart.
+        output_format: "svg" for in-chat display, "png" when a raster export is needed
+    
+    Returns:
+        One status message per chart, in input order.
+    """
+    results: List[Optional[str]] = [None] * len(charts)
+    specs = _build_chart_specs(charts, results)
+    
+    # vl-convert releases the GIL while rendering, so renders overlap on threads.
+    # Processes would each pay the renderer's cold start and lose the Chainlit context.
+    workers = max(1, min(len(specs), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            i: executor.submit(_render_chart, spec, output_format) for i, spec in specs.items()
         }
-        
-        source = alt.Data(values=data)
-        
-        if chart_type == "pie":
-            chart = alt.Chart(source).mark_arc(innerRadius=50).encode(
-                theta=alt.Theta(field=y_field, type="quantitative"),
-                color=alt.Color(
-                    field=x_field_display,
-                    type="nominal",
-                    title=x_title or x_field.replace("_", " ").title()
-                )
-            ).properties(width=width, height=height, title=title)
-        
-        elif color_field and color_scheme:
-            domain = list(color_scheme.keys())
-            range_colors = [color_map.get(color_scheme[k].lower(), color_scheme[k]) for k in domain]
-            
-            x_enc = alt.X(
-                field=x_field_display,
-                type="nominal",
-                title=x_title or "Date",
-                sort=unique_months if unique_months else None,
-                axis=alt.Axis(labelAngle=-45)
-            )
-            
-            y_enc = alt.Y(
-                field=y_field,
-                type="quantitative",
-                title=y_title or y_field.replace("_", " ").title(),
-                scale=alt.Scale(zero=True)
-            )
-            
-            color_enc = alt.Color(
-                field=color_field,
-                type="nominal",
-                title=color_field.replace("_", " ").title(),
-                scale=alt.Scale(domain=domain, range=range_colors)
-            )
-            
-            if chart_type == "line":
-                stroke_dash_range = [[1, 0] if k != "Forecast" else [5, 5] for k in domain]
-                chart = alt.Chart(source).mark_line(point=True, strokeWidth=2).encode(
-                    x=x_enc,
-                    y=y_enc,
-                    color=color_enc,
-                    strokeDash=alt.StrokeDash(
-                        field=color_field,
-                        type="nominal",
-                        scale=alt.Scale(domain=domain, range=stroke_dash_range),
-                        legend=None
-                    )
-                ).properties(width=width, height=height, title=title)
-            elif chart_type == "bar":
-                chart = alt.Chart(source).mark_bar().encode(
-                    x=x_enc,
-                    y=y_enc,
-                    color=color_enc,
-                    xOffset=alt.XOffset(field=color_field, type="nominal")
-                ).properties(width=width, height=height, title=title)
-            elif chart_type == "area":
-                chart = alt.Chart(source).mark_area(line=True, point=True, opacity=0.5).encode(
-                    x=x_enc,
-                    y=y_enc,
-                    color=color_enc
-                ).properties(width=width, height=height, title=title)
-            else:
-                return f"Unknown chart type: {chart_type}"
-        
-        else:
-            x_enc = alt.X(
-                field=x_field_display,
-                type="nominal",
-                title=x_title or x_field.replace("_", " ").title(),
-                sort=unique_months if unique_months else ("-y" if chart_type == "bar" else None),
-                axis=alt.Axis(labelAngle=-45) if is_temporal else alt.Axis()
-            )
-            
-            y_enc = alt.Y(
-                field=y_field,
-                type="quantitative",
-                title=y_title or y_field.replace("_", " ").title(),
-                scale=alt.Scale(zero=True)
-            )
-            
-            if chart_type == "bar":
-                chart = alt.Chart(source).mark_bar().encode(
-                    x=x_enc,
-                    y=y_enc,
-                    color=alt.Color(field=x_field_display, type="nominal", legend=None)
-                )
-            elif chart_type == "line":
-                chart = alt.Chart(source).mark_line(point=True, strokeWidth=2).encode(
-                    x=x_enc,
-                    y=y_enc
-                )
-            elif chart_type == "area":
-                chart = alt.Chart(source).mark_area(line=True, point=True).encode(
-                    x=x_enc,
-                    y=y_enc
-                )
-            else:
-                return f"Unknown chart type: {chart_type}. Use: bar, line, pie, area"
-            
-            chart = chart.properties(width=width, height=height, title=title)
-        
-        out_dir = "outputs"
-        os.makedirs(out_dir, exist_ok=True)
-        out_path = os.path.join(out_dir, "chart.png")
-        chart.save(out_path, format="png")
-        
-        async def send_image():
-            image_element = cl.Image(path=out_path, name=title, display="inline")
-            await cl.Message(content="", elements=[image_element]).send()
-        
+    
+    for i, future in futures.items():
+        title = specs[i]["title"]
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(send_image())
-            else:
-                asyncio.run(send_image())
-        except RuntimeError:
-            asyncio.run(send_image())
-        
-        return f"Chart '{title}' created successfully."
-        
+            _send_image(future.result(), title, output_format)
+            results[i] = _chart_created(title)
+        except Exception as e:
+            results[i] = _chart_error(e)
+    
+    return results
+
+
+def _build_chart_specs(
+    charts: List[Dict[str, Any]],
+    results: List[Optional[str]]
+) -> Dict[int, Dict[str, Any]]:
+    """Build a spec per create_charts entry, recording failures in results by index."""
+    specs = {}
+    for i, chart in enumerate(charts):
+        try:
+            specs[i] = build_chart_spec(**chart)
+        except Exception as e:
+            results[i] = _chart_error(e)
+    return specs
+
+
+def _chart_created(title: str) -> str:
+    """Result message for a chart that was rendered and sent."""
+    return f"Chart '{title}' created successfully."
+
+
+def _chart_error(e: Exception) -> str:
+    """Result message for a chart that failed; spec errors are already user-facing."""
+    if isinstance(e, ChartSpecError):
+        return str(e)
+    logger.opt(exception=e).debug("create_chart failed")
+    return f"Failed to create chart: {str(e)}"
+
+
+async def acreate_chart(output_format: Literal["svg", "png"] = "svg", **chart: Any) -> str:
+    """
+    Async counterpart of create_chart for use from the agent's event loop; takes the
+    same keyword arguments. Renders on a worker thread and awaits the chat message.
+    """
+    try:
+        spec = build_chart_spec(**chart)
+        image = await asyncio.to_thread(_render_chart, spec, output_format)
+        await _send_image_async(image, spec["title"], output_format)
+        return _chart_created(spec["title"])
     except Exception as e:
-        import traceback
-        return f"Failed to create chart: {str(e)}\n{traceback.format_exc()}"
+        return _chart_error(e)
+
+
+async def acreate_charts(
+    charts: List[Dict[str, Any]],
+    output_format: Literal["svg", "png"] = "svg"
+) -> List[str]:
+    """Async counterpart of create_charts; renders concurrently on worker threads."""
+    results: List[Optional[str]] = [None] * len(charts)
+    specs = _build_chart_specs(charts, results)
+    
+    images = await asyncio.gather(
+        *(asyncio.to_thread(_render_chart, spec, output_format) for spec in specs.values()),
+        return_exceptions=True
+    )
+    
+    for (i, spec), image in zip(specs.items(), images):
+        title = spec["title"]
+        try:
+            if isinstance(image, BaseException):
+                raise image
+            await _send_image_async(image, title, output_format)
+            results[i] = _chart_created(title)
+        except Exception as e:
+            results[i] = _chart_error(e)
+    
+    return results
 
 
 def render_vega_lite_png(spec: Union[str, dict], output_path: str = "outputs/chart.png") -> str:
     """Render a raw Vega-Lite JSON specification as PNG."""
-    import chainlit as cl
-    import asyncio
-    
     try:
         if isinstance(spec, str):
-            spec = json.loads(spec)
-        
-        if "$schema" not in spec:
-            spec["$schema"] = "https://vega.github.io/schema/vega-lite/v5.json"
-        if "width" not in spec:
-            spec["width"] = 400
-        if "height" not in spec:
-            spec["height"] = 300
+            spec = orjson.loads(spec)
         
-        chart = alt.Chart.from_dict(spec)
+        spec = {**RAW_SPEC_DEFAULTS, **spec}
         
         output_dir = os.path.dirname(output_path)
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
         
-        chart.save(output_path, format="png")
+        png = _render_chart(spec, "png")
+        _write_chunks(output_path, (png,))
         
-        async def send_image():
-            image_element = cl.Image(path=output_path, name="Chart", display="inline")
-            await cl.Message(content="", elements=[image_element]).send()
-        
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(send_image())
-            else:
-                asyncio.run(send_image())
-        except RuntimeError:
-            asyncio.run(send_image())
+        _send_image(png, "Chart", "png")
         
         return "Chart created successfully."
         
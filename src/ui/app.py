@@ -2,11 +2,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import asyncio
-import json
+import functools
+import orjson
 import os
 import chainlit as cl
 from loguru import logger
-from typing import cast
+from dataclasses import dataclass
 from langchain.tools import StructuredTool
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
@@ -15,29 +16,28 @@ from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import create_react_agent
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from src.utils.mcp_tools_wrapper import wrap_mcp_tools
+from src.utils.mcp_tools_wrapper import wrap_mcp_tools, clear_tool_cache
 
 ENABLE_MCP = os.getenv("CHAINLIT_ENABLE_MCP", "true").lower() == "true"
 cl.enable_mcp = True
 
-# Debug MCP configuration
-logger.info("=" * 50)
-logger.info("MCP CONFIGURATION DEBUG")
-logger.info("=" * 50)
-mcp_config_env = os.getenv('CHAINLIT_MCP_CONFIG')
-logger.info(f"CHAINLIT_MCP_CONFIG env: {mcp_config_env}")
-
-if mcp_config_env and os.path.exists(mcp_config_env):
-    with open(mcp_config_env) as f:
-        mcp_json = json.load(f)
-        logger.info(f"MCP JSON content: {json.dumps(mcp_json, indent=2)}")
-else:
-    logger.error("MCP config file not found or env var not set!")
-
-logger.info(f"Chainlit enable_mcp: {getattr(cl, 'enable_mcp', 'not set')}")
-logger.info("=" * 50)
-
-from src.tools.visual import titan_image_generate, create_chart
+# Debug MCP configuration; set APP_DEBUG_MCP=1 to log it at startup.
+# A missing or unreadable config is reported by initialize_mcp either way.
+if os.getenv("APP_DEBUG_MCP") == "1":
+    mcp_config_env = os.getenv('CHAINLIT_MCP_CONFIG')
+    logger.info("\n".join([
+        "=" * 50,
+        "MCP CONFIGURATION DEBUG",
+        "=" * 50,
+        f"CHAINLIT_MCP_CONFIG env: {mcp_config_env}",
+        f"Config file exists: {bool(mcp_config_env and os.path.exists(mcp_config_env))}",
+        f"Chainlit enable_mcp: {getattr(cl, 'enable_mcp', 'not set')}",
+        "=" * 50,
+    ]))
+
+from src.tools.visual import (
+    titan_image_generate, create_chart, create_charts, acreate_chart, acreate_charts
+)
 from src.utils.bedrock import get_chat_model
 from src.utils.models import ModelId
 from src.utils.stream import stream_to_chainlit
@@ -45,16 +45,115 @@ from src.utils.stream import stream_to_chainlit
 # ============================================================================
 # Global MCP state
 # ============================================================================
+@dataclass(slots=True)
+class MCPConnection:
+    """A live MCP server; owner keeps its stdio client and session open until close is set."""
+    name: str
+    session: ClientSession
+    tools: list
+    close: asyncio.Event
+    owner: asyncio.Task
+
+
 _mcp_tools = []
 _mcp_ready = False
 _mcp_connections = []
+# Serializes initialization so concurrent callers wait on the same run
+_mcp_init_lock = asyncio.Lock()
+# Strong reference to the startup initialization task
+_mcp_init_task = None
+# Last parsed MCP config as (path, mtime_ns, config)
+_mcp_config_cache = None
+
+# Agent shared by all sessions, its welcome message, and the MCP tool names it was built from
+_agent = None
+_agent_welcome = ""
+_agent_key = None
+
+# Separator line for the MCP initialization log blocks
+_BANNER = "=" * 60
+
+# Streamed tokens are buffered and sent to the UI once STREAM_FLUSH_CHARS
+# accumulate, and at least every STREAM_FLUSH_INTERVAL while text is pending
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_INTERVAL = 0.05  # seconds
+
+# Run settings shared by every agent invocation; LangChain copies
+# "configurable" into each run's config, so the dict is never mutated
+AGENT_RUN_CONFIG = {
+    "recursion_limit": 50,
+    "configurable": {
+        "thread_id": "default"
+    }
+}
+
+# Bedrock model (inference profile) the agent runs on
+AGENT_MODEL_ID = ModelId.ANTHROPIC_CLAUDE_3_5_SONNET_US.value
+
+# Most recent user/assistant turns kept as context for the agent (at least 1)
+MAX_HISTORY_TURNS = 40
+try:
+    MAX_HISTORY_TURNS = max(
+        1, int(os.getenv("MAX_HISTORY_TURNS", MAX_HISTORY_TURNS))
+    )
+except ValueError:
+    logger.warning(
+        "Invalid MAX_HISTORY_TURNS {!r}, using {}",
+        os.getenv("MAX_HISTORY_TURNS"), MAX_HISTORY_TURNS
+    )
+
+
+def _load_mcp_config(path: str) -> dict:
+    """Parse the MCP config at path, reusing the last parse while the file is unchanged."""
+    global _mcp_config_cache
+
+    mtime = os.stat(path).st_mtime_ns
+    if _mcp_config_cache is not None and _mcp_config_cache[:2] == (path, mtime):
+        return _mcp_config_cache[2]
+
+    with open(path, "rb") as f:
+        mcp_config = orjson.loads(f.read())
+    logger.opt(lazy=True).debug(
+        "MCP JSON content: {}",
+        lambda: orjson.dumps(mcp_config, option=orjson.OPT_INDENT_2).decode()
+    )
+
+    _mcp_config_cache = (path, mtime, mcp_config)
+    return mcp_config
+
+
+async def _run_mcp_server(server_name, server_params, ready, close):
+    """
+    Own one MCP server connection for its whole lifetime.
+
+    The stdio client and session are anyio contexts that must be exited by
+    the task that entered them, so this task enters both, hands the session
+    and tools back through ready, and waits for close before exiting them.
+    """
+    try:
+        async with stdio_client(server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                ready.set_result((session, await load_mcp_tools(session)))
+                await close.wait()
+    except Exception as e:
+        if not ready.done():
+            ready.set_exception(e)
+        else:
+            logger.error(f"❌ Connection to '{server_name}' ended with error: {e}")
 
 
 async def initialize_mcp():
     """
     Initialize MCP tools from all servers defined in CHAINLIT_MCP_CONFIG.
     Creates a separate session for each MCP server and keeps connections alive.
+    Concurrent callers wait for the initialization already in progress.
     """
+    async with _mcp_init_lock:
+        await _initialize_mcp()
+
+
+async def _initialize_mcp():
     global _mcp_tools, _mcp_ready, _mcp_connections
 
     if _mcp_ready:
@@ -67,16 +166,16 @@ async def initialize_mcp():
         _mcp_ready = False
         return
 
-    logger.info("=" * 60)
-    logger.info("🔌 Initializing MCP servers...")
-    logger.info("=" * 60)
-
     mcp_config_path = os.getenv("CHAINLIT_MCP_CONFIG", ".chainlit/mcp.json")
-    logger.info(f"Using MCP config file: {mcp_config_path}")
+    logger.info("\n".join([
+        _BANNER,
+        "🔌 Initializing MCP servers...",
+        _BANNER,
+        f"Using MCP config file: {mcp_config_path}",
+    ]))
 
     try:
-        with open(mcp_config_path, "r") as f:
-            mcp_config = json.load(f)
+        mcp_config = _load_mcp_config(mcp_config_path)
     except Exception as e:
         logger.error(f"Failed to load MCP config from {mcp_config_path}: {e}")
         _mcp_tools = []
@@ -90,20 +189,24 @@ async def initialize_mcp():
         _mcp_ready = False
         return
 
-    all_tools = []
+    # Per-server progress is collected and logged as one block at the end,
+    # keyed by server so concurrent loads don't interleave their lines
+    report = {}
 
-    for server_name, server_cfg in servers.items():
+    async def _load_one(server_name, server_cfg):
+        """Connect to a single MCP server and return its connection record."""
         command = server_cfg.get("command")
         args = server_cfg.get("args", [])
         env = server_cfg.get("env", {})
+        lines = report.setdefault(server_name, [])
 
-        logger.info(f"📡 Loading MCP server '{server_name}'...")
-        logger.info(f"   Command: {command}")
-        logger.info(f"   Args: {args}")
+        lines.append(f"📡 Loading MCP server '{server_name}'...")
+        lines.append(f"   Command: {command}")
+        lines.append(f"   Args: {args}")
 
         if not command:
-            logger.warning(f"Skipping '{server_name}' - missing 'command'")
-            continue
+            logger.warning("Skipping '{}' - missing 'command'", server_name)
+            return None
 
         try:
             server_params = StdioServerParameters(
@@ -112,42 +215,63 @@ async def initialize_mcp():
                 env=env
             )
 
-            client_context = stdio_client(server_params)
-            read, write = await client_context.__aenter__()
-
-            session_context = ClientSession(read, write)
-            session = await session_context.__aenter__()
-            await session.initialize()
-
-            server_tools = await load_mcp_tools(session)
-
-            _mcp_connections.append({
-                'name': server_name,
-                'client_context': client_context,
-                'session_context': session_context,
-                'session': session,
-                'tools': server_tools
-            })
-
-            logger.info(f"✅ Server '{server_name}' loaded with {len(server_tools)} tools:")
-            for tool in server_tools:
-                logger.info(f"   - {tool.name}")
-
-            all_tools.extend(server_tools)
+            # A failed handshake exits the owner's contexts before ready is
+            # resolved, so it doesn't leave the server subprocess running
+            ready = asyncio.get_running_loop().create_future()
+            close = asyncio.Event()
+            owner = asyncio.create_task(_run_mcp_server(server_name, server_params, ready, close))
+            try:
+                session, server_tools = await ready
+            except asyncio.CancelledError:
+                owner.cancel()
+                raise
+
+            lines.append(f"✅ Server '{server_name}' loaded with {len(server_tools)} tools:")
+            lines.append(f"   {', '.join(tool.name for tool in server_tools)}")
+
+            return MCPConnection(
+                name=server_name,
+                session=session,
+                tools=server_tools,
+                close=close,
+                owner=owner
+            )
 
         except Exception as e:
             logger.error(f"❌ Failed to load server '{server_name}': {str(e)}")
             logger.exception("Full error:")
+            return None
+
+    # Servers are independent subprocesses, so spawn them concurrently
+    results = await asyncio.gather(
+        *(_load_one(name, cfg) for name, cfg in servers.items()),
+        return_exceptions=True
+    )
+
+    all_tools = []
+    for server_name, result in zip(servers, results):
+        if isinstance(result, BaseException):
+            logger.opt(exception=result).error(
+                f"❌ Failed to load server '{server_name}': {result}"
+            )
+            continue
+        if result is None:
+            continue
+        _mcp_connections.append(result)
+        all_tools.extend(result.tools)
 
     _mcp_tools = all_tools
     _mcp_ready = len(all_tools) > 0
 
-    logger.info("=" * 60)
-    logger.info("✅ MCP initialization complete!")
-    logger.info(f"   Total servers attempted: {len(servers)}")
-    logger.info(f"   Total servers connected: {len(_mcp_connections)}")
-    logger.info(f"   Total tools loaded: {len(_mcp_tools)}")
-    logger.info("=" * 60)
+    logger.info("\n".join([
+        *(line for lines in report.values() for line in lines),
+        _BANNER,
+        "✅ MCP initialization complete!",
+        f"   Total servers attempted: {len(servers)}",
+        f"   Total servers connected: {len(_mcp_connections)}",
+        f"   Total tools loaded: {len(_mcp_tools)}",
+        _BANNER,
+    ]))
 
     if not _mcp_ready:
         logger.warning("⚠️  No MCP tools loaded successfully")
@@ -159,20 +283,24 @@ async def cleanup_mcp():
 
     logger.info("🔌 Cleaning up MCP connections...")
 
-    for connection in _mcp_connections:
-        try:
-            server_name = connection['name']
-            await connection['session_context'].__aexit__(None, None, None)
-            await connection['client_context'].__aexit__(None, None, None)
-            logger.info(f"✅ Closed connection to '{server_name}'")
-        except Exception as e:
-            logger.error(f"❌ Error closing '{server_name}': {e}")
+    async def _close_one(connection):
+        """Signal the owner task to close the session and stdio client, then wait for it."""
+        connection.close.set()
+        await connection.owner
+        logger.info("✅ Closed connection to '{}'", connection.name)
+
+    # Servers shut down independently, so close them concurrently
+    await asyncio.gather(
+        *(_close_one(connection) for connection in _mcp_connections),
+        return_exceptions=True
+    )
 
     _mcp_connections.clear()
 
 
+@functools.lru_cache(maxsize=1)
 def base_tools():
-    """Return base visual tools."""
+    """Return base visual tools, built once and shared by every session."""
     return [
         StructuredTool.from_function(
             func=titan_image_generate,
@@ -181,6 +309,7 @@ def base_tools():
         ),
         StructuredTool.from_function(
             func=create_chart,
+            coroutine=acreate_chart,
             name="create_chart",
             description="""Create a chart with simple parameters.
 
@@ -192,6 +321,7 @@ Parameters:
 - title: Chart title
 - color_field: (optional) Field to group by color (e.g., "type" for Actual vs Forecast)
 - color_scheme: (optional) Dict mapping values to colors {"Actual": "blue", "Forecast": "orange"}
+- output_format: (optional) "svg" (default, fastest for chat) or "png" for a raster export
 
 Example for cost trend with actuals and forecast:
 create_chart(
@@ -208,13 +338,30 @@ create_chart(
     color_scheme={"Actual": "blue", "Forecast": "orange"}
 )"""
         ),
-    ]
+        StructuredTool.from_function(
+            func=create_charts,
+            coroutine=acreate_charts,
+            name="create_charts",
+            description="Create several charts in one call (e.g. a cost dashboard). "
+            """Charts render in parallel.
 
+Parameters:
+- charts: List of dicts, each holding the create_chart parameters for one chart
+- output_format: (optional) "svg" (default) or "png" for raster exports"""
+        ),
+        StructuredTool.from_function(
+            func=clear_tool_cache,
+            name="clear_tool_cache",
+            description=(
+                "Forget cached AWS read results (costs, describe/list calls) so the next "
+                "tool calls fetch fresh data. Use when the user asks for up-to-date numbers."
+            )
+        ),
+    ]
 
-def build_agent(tools: list) -> CompiledStateGraph:
-    """Build the LangGraph agent with provided tools and system prompt."""
 
-    system_prompt = """You are the OptimNow FinOps Agent, an AWS cost optimization expert.
+# System prompt for the FinOps agent; its SystemMessage is built once and reused
+SYSTEM_PROMPT = """You are the OptimNow FinOps Agent, an AWS cost optimization expert.
 
 ## Behavior
 - Be direct - NO apologies, NO excessive politeness
@@ -238,12 +385,20 @@ def build_agent(tools: list) -> CompiledStateGraph:
 - Charts for trends
 - Brief recommendations
 - No unnecessary text"""
+_SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+
+def build_agent(tools: list) -> CompiledStateGraph:
+    """Build the LangGraph agent with provided tools and system prompt."""
 
     def add_system_prompt(state):
         """Add system prompt to the state."""
-        return [SystemMessage(content=system_prompt)] + state["messages"]
+        messages = state["messages"]
+        if messages and isinstance(messages[0], SystemMessage):
+            return messages
+        return [_SYSTEM_MESSAGE, *messages]
 
-    model = get_chat_model(model_id=ModelId.ANTHROPIC_CLAUDE_3_5_SONNET_US.value)
+    model = get_chat_model(model_id=AGENT_MODEL_ID)
     return create_react_agent(
         model,
         tools,
@@ -251,39 +406,104 @@ def build_agent(tools: list) -> CompiledStateGraph:
     )
 
 
+def get_agent():
+    """
+    Return the shared agent and its welcome message.
+
+    Both are rebuilt only when the set of MCP tool names changes. Keyed on
+    names rather than the list object, since _initialize_mcp assigns a new
+    empty list on every call while MCP is disabled or failing.
+    """
+    global _agent, _agent_welcome, _agent_key
+
+    key = (_tool_names(_mcp_tools), _mcp_ready)
+    if _agent is None or _agent_key != key:
+        wrapped_mcp_tools = wrap_mcp_tools(_mcp_tools) if _mcp_tools else []
+        current_tools = base_tools() + wrapped_mcp_tools
+        logger.info(
+            "Building agent with {} total tools ({} from MCP)",
+            len(current_tools), len(_mcp_tools)
+        )
+        _agent = build_agent(current_tools)
+        _agent_welcome = build_welcome_message(current_tools, _mcp_tools, _mcp_ready)
+        _agent_key = key
+
+    return _agent, _agent_welcome
+
+
+def _tool_names(tools) -> tuple:
+    """Return the display name of each tool."""
+    return tuple(getattr(t, "name", str(t)) for t in tools)
+
+
 def build_welcome_message(current_tools, mcp_tools, mcp_ready: bool) -> str:
     """Build a dynamic welcome message based on loaded tools."""
-    lines = []
-    lines.append("👋 Welcome to the **OptimNow FinOps Assistant**!")
-    lines.append("")
+    return _welcome_message(_tool_names(current_tools), _tool_names(mcp_tools), mcp_ready)
+
+
+@functools.lru_cache(maxsize=4)
+def _welcome_message(tool_names: tuple, mcp_names: tuple, mcp_ready: bool) -> str:
+    """Render the welcome message; cached since the tool set rarely changes."""
+    header = "👋 Welcome to the **OptimNow FinOps Assistant**!\n\n"
 
-    if not mcp_ready or not mcp_tools:
-        lines.append("⚠️ MCP connection is not available. Running with local tools only.")
-        lines.append("")
-        lines.append("You can still ask questions, but AWS billing data access is limited.")
-        return "\n".join(lines)
+    if not mcp_ready or not mcp_names:
+        return (
+            f"{header}"
+            "⚠️ MCP connection is not available. Running with local tools only.\n\n"
+            "You can still ask questions, but AWS billing data access is limited."
+        )
 
-    mcp_tool_names = sorted({getattr(t, "name", str(t)) for t in mcp_tools})
-    all_tool_names = sorted({getattr(t, "name", str(t)) for t in current_tools})
-    local_tool_names = sorted(set(all_tool_names) - set(mcp_tool_names))
+    mcp_set = set(mcp_names)
+    mcp_tool_names = sorted(mcp_set)
+    local_tool_names = sorted(set(tool_names) - mcp_set)
 
-    lines.append("✅ MCP connection established.")
-    lines.append(f"Loaded {len(mcp_tools)} MCP tools and {len(local_tool_names)} local tools.")
-    lines.append("")
+    mcp_block = "".join(f"- {name}\n" for name in mcp_tool_names)
+    local_block = (
+        "**Local tools available:**\n" + "".join(f"- {name}\n" for name in local_tool_names) + "\n"
+        if local_tool_names else ""
+    )
+
+    return (
+        f"{header}"
+        "✅ MCP connection established.\n"
+        f"Loaded {len(mcp_names)} MCP tools and {len(local_tool_names)} local tools.\n\n"
+        f"**MCP tools available:**\n{mcp_block}\n"
+        f"{local_block}"
+        "You can now ask questions about your AWS costs and billing!"
+    )
 
-    lines.append("**MCP tools available:**")
-    for name in mcp_tool_names:
-        lines.append(f"- {name}")
-    lines.append("")
 
-    if local_tool_names:
-        lines.append("**Local tools available:**")
-        for name in local_tool_names:
-            lines.append(f"- {name}")
-        lines.append("")
+@cl.on_app_startup
+async def on_app_startup():
+    """Start MCP initialization once, before the first chat session arrives."""
+    global _mcp_init_task
+    _mcp_init_task = asyncio.create_task(_startup())
+    _mcp_init_task.add_done_callback(_log_startup_failure)
 
-    lines.append("You can now ask questions about your AWS costs and billing!")
-    return "\n".join(lines)
+
+def _log_startup_failure(task: asyncio.Task):
+    """Log an exception from the startup task, so it never goes unretrieved."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.opt(exception=task.exception()).error("❌ Startup initialization failed")
+
+
+async def _startup():
+    """Connect to MCP servers, then compile the shared agent."""
+    # boto3 client construction reads credentials and config files, so the
+    # cached chat model is built in a worker thread while MCP servers connect
+    await asyncio.gather(
+        initialize_mcp(),
+        asyncio.to_thread(get_chat_model, model_id=AGENT_MODEL_ID),
+    )
+    get_agent()
+
+
+@cl.on_app_shutdown
+async def on_app_shutdown():
+    """Close MCP server connections when the app exits; chat sessions never do."""
+    if _mcp_init_task is not None and not _mcp_init_task.done():
+        _mcp_init_task.cancel()
+    await cleanup_mcp()
 
 
 @cl.on_chat_start
@@ -291,62 +511,104 @@ async def on_chat_start():
     """Initialize the chat session."""
     cl.user_session.set("chat_messages", [])
 
-    await initialize_mcp()
-
-    wrapped_mcp_tools = wrap_mcp_tools(_mcp_tools) if _mcp_tools else []
+    # Wait for the startup task, so the chat model it builds off the event
+    # loop isn't built a second time here. asyncio.wait neither raises the
+    # task's error (already logged) nor cancels it if this session goes away.
+    if _mcp_init_task is not None:
+        await asyncio.wait({_mcp_init_task})
 
-    current_tools = base_tools() + wrapped_mcp_tools
-    logger.info(f"Building agent with {len(current_tools)} total tools ({len(_mcp_tools)} from MCP)")
+    # Returns immediately once startup initialization has finished
+    await initialize_mcp()
 
-    agent = build_agent(current_tools)
+    agent, welcome_message = get_agent()
     cl.user_session.set("agent", agent)
 
-    message = build_welcome_message(current_tools, _mcp_tools, _mcp_ready)
-    await cl.Message(content=message).send()
+    await cl.Message(content=welcome_message).send()
 
 
 @cl.on_message
 async def on_message(message: cl.Message):
     """Handle incoming messages."""
-    agent = cast(CompiledStateGraph, cl.user_session.get("agent"))
-    chat_messages = cl.user_session.get("chat_messages", [])
-
-    # Add the user message to history
-    user_msg = HumanMessage(content=message.content)
-    chat_messages.append(user_msg)
+    agent: CompiledStateGraph = cl.user_session.get("agent")
+    # The session hands back the stored list itself, so appends persist
+    chat_messages = cl.user_session.get("chat_messages")
+    if chat_messages is None:
+        chat_messages = []
+        cl.user_session.set("chat_messages", chat_messages)
 
+    # Send the empty reply while the agent starts, not before; it must have
+    # arrived before the first token is streamed into it
     msg = cl.Message(content="")
-    await msg.send()
-
-    config = RunnableConfig(
-        callbacks=[cl.LangchainCallbackHandler()],
-        recursion_limit=50,
-        configurable={
-            "thread_id": "default"
-        }
-    )
-
-    # Collect the full response
-    full_response = ""
+    send_task = asyncio.create_task(msg.send())
+
+    # The Chainlit handler binds to this message's context, so it stays per turn
+    config = RunnableConfig(callbacks=[cl.LangchainCallbackHandler()], **AGENT_RUN_CONFIG)
+
+    # Collect the full response; joined once at the end instead of growing a str
+    chunks = []
+
+    # Coalesce small model chunks into fewer websocket frames;
+    # chunks[flushed:] is what the UI hasn't received yet
+    flushed = 0
+    buffered_chars = 0
+    flush_lock = asyncio.Lock()
+    stream_done = asyncio.Event()
+
+    async def flush():
+        """Send everything buffered so far, in order."""
+        nonlocal flushed, buffered_chars
+        async with flush_lock:
+            if flushed < len(chunks):
+                text = "".join(chunks[flushed:])
+                flushed = len(chunks)
+                buffered_chars = 0
+                await msg.stream_token(text)
+
+    async def flush_periodically():
+        """Flush on a timer, so text stays visible while a tool call blocks the stream."""
+        await send_task
+        while not stream_done.is_set():
+            try:
+                await asyncio.wait_for(stream_done.wait(), STREAM_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                await flush()
+
+    flush_task = asyncio.create_task(flush_periodically())
 
     try:
-        async for chunk in stream_to_chainlit(agent, message.content, chat_messages[:-1], config):
-            full_response += chunk
-            await msg.stream_token(chunk)
+        async for chunk in stream_to_chainlit(agent, message.content, chat_messages, config):
+            chunks.append(chunk)
+            buffered_chars += len(chunk)
+            if buffered_chars >= STREAM_FLUSH_CHARS:
+                await send_task
+                await flush()
     except Exception as e:
         logger.exception("Error during agent execution")
-        error_msg = f"\n\n❌ Error: {str(e)}"
-        full_response += error_msg
-        await msg.stream_token(error_msg)
+        chunks.append(f"\n\n❌ Error: {str(e)}")
+    finally:
+        stream_done.set()
+        await flush_task
+
+    await flush()
 
     await msg.update()
 
-    # Add the assistant response to history
+    full_response = "".join(chunks)
+
+    # Add the user message and the assistant response to history
+    chat_messages.append(HumanMessage(content=message.content))
     if full_response:
-        assistant_msg = AIMessage(content=full_response)
-        chat_messages.append(assistant_msg)
-        cl.user_session.set("chat_messages", chat_messages)
-        logger.info(f"💾 Chat history updated. Total messages: {len(chat_messages)}")
+        chat_messages.append(AIMessage(content=full_response))
+
+    # Slide the window so long sessions don't grow the prompt without bound;
+    # the kept history must still open with a user message
+    if len(chat_messages) > 2 * MAX_HISTORY_TURNS:
+        del chat_messages[:-2 * MAX_HISTORY_TURNS]
+        while chat_messages and not isinstance(chat_messages[0], HumanMessage):
+            del chat_messages[0]
+
+    if full_response:
+        logger.info("💾 Chat history updated. Total messages: {}", len(chat_messages))
 
 
 @cl.on_chat_end
@@ -1,4 +1,5 @@
 import boto3
+import functools
 import os
 import warnings
 from botocore.config import Config
@@ -19,14 +20,18 @@ else:
     BedrockRuntimeClient = object
 
 
+@functools.lru_cache(maxsize=4)
 def get_bedrock_client(region_name: str = 'us-east-1') -> BedrockRuntimeClient:
     """Get a Bedrock client.
 
-    Uses a custom config with retries and read timeout.
+    Clients are cached per region, so repeated calls reuse one client and its
+    connection pool. Uses a custom config with retries and read timeout.
 
     Config is used to set the following:
-    - retries: max_attempts=5, mode='adaptive'
+    - retries: max_attempts=10, mode='adaptive'
     - read_timeout=60
+    - max_pool_connections=50, so concurrent sessions don't queue for a socket
+    - tcp_keepalive=True, to keep pooled connections alive between calls
 
     Returns:
         BedrockRuntimeClient: Bedrock client
@@ -37,10 +42,13 @@ def get_bedrock_client(region_name: str = 'us-east-1') -> BedrockRuntimeClient:
         config=Config(
             retries={'max_attempts': 10, 'mode': 'adaptive'},
             read_timeout=60,
+            max_pool_connections=50,
+            tcp_keepalive=True,
         ),
     )
 
 
+@functools.lru_cache(maxsize=8)
 def get_chat_model(
     model_id: str = ModelId.ANTHROPIC_CLAUDE_SONNET_4_5,
     temperature: float = 0.0,
@@ -49,6 +57,8 @@ def get_chat_model(
     """
     Get a ChatBedrockConverse model instance.
     For Claude 4.x models, use inference profiles (global.anthropic.*).
+    Instances are cached per argument set, so rebuilt agents share one model.
+    Set BEDROCK_LATENCY_OPTIMIZED=1 to request latency-optimized inference.
     
     Args:
         model_id: The model ID or inference profile ID to use
@@ -58,25 +68,26 @@ def get_chat_model(
     Returns:
         Configured ChatBedrockConverse instance
     """
-    import boto3
-    
     # Resolve model_id if it's still a class attribute reference
     if hasattr(model_id, '__class__') and 'ModelId' in str(model_id.__class__):
         logger.error(f"❌ model_id is not resolved: {model_id}")
         raise ValueError(f"model_id must be a string, got: {type(model_id)}")
     
-    # Inference profiles must use us-east-1 endpoint
-    bedrock_runtime = boto3.client(
-        service_name="bedrock-runtime",
-        region_name="us-east-1",
-    )
+    # Inference profiles must use us-east-1 endpoint; shares the cached pooled client
+    bedrock_runtime = get_bedrock_client("us-east-1")
+    
+    logger.info("🤖 Using model: {}", model_id)
+    logger.info("   Temperature: {}, Max tokens: {}", temperature, max_tokens)
     
-    logger.info(f"🤖 Using model: {model_id}")
-    logger.info(f"   Temperature: {temperature}, Max tokens: {max_tokens}")
+    performance_config = None
+    if os.getenv("BEDROCK_LATENCY_OPTIMIZED") == "1":
+        performance_config = {"latency": "optimized"}
+        logger.info("   Latency: optimized")
     
     return ChatBedrockConverse(
         client=bedrock_runtime,
         model=model_id,
         temperature=temperature,
         max_tokens=max_tokens,
+        performance_config=performance_config,
     )
@@ -1,10 +1,20 @@
 """
 MCP Tools Wrapper - Wraps MCP tools to add consent management.
 """
+from collections import OrderedDict
 from langchain.tools import StructuredTool
 from loguru import logger
-from typing import Any
+from typing import Any, Optional
 import chainlit as cl
+import orjson
+import shlex
+import time
+
+# Read-only tool results are reused for up to this many seconds. Cost Explorer
+# data lags 24-48h, so an hour is safe; infrastructure snapshots change faster.
+TOOL_CACHE_TTL_COST = 3600
+TOOL_CACHE_TTL_AWS_READ = 60
+TOOL_CACHE_SIZE = 256
 
 
 class ConsentDeniedError(Exception):
@@ -12,6 +22,75 @@ class ConsentDeniedError(Exception):
     pass
 
 
+class ToolResultCache:
+    """
+    LRU cache of tool results where every entry expires after its own TTL.
+
+    The module keeps one instance for the whole process, so every chat
+    session shares it: a read made in one session can be served to another
+    that uses the same MCP servers and AWS credentials.
+    """
+
+    def __init__(self, maxsize: int = TOOL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        """Return (hit, result) for key, dropping it if it has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, result
+
+    def set(self, key: tuple, result: Any, ttl: float) -> None:
+        """Store result under key for ttl seconds, evicting the oldest entry when full."""
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self._entries.clear()
+
+
+_tool_cache = ToolResultCache()
+
+
+def clear_tool_cache() -> str:
+    """Forget cached AWS tool results so the next calls fetch fresh data."""
+    _tool_cache.clear()
+    logger.info("🧹 Tool result cache cleared")
+    return "Cached AWS results cleared. The next calls will fetch fresh data."
+
+
+def tool_cache_ttl(tool_name: str, arguments: dict) -> Optional[float]:
+    """
+    Return how long a result of this call may be reused, or None to never cache it.
+
+    call_aws is only cached when its command is known to be read-only, so
+    repeating any other command always runs it again.
+    """
+    if tool_name.startswith("get_cost"):
+        return TOOL_CACHE_TTL_COST
+    if tool_name == "call_aws" and is_readonly_aws_command(aws_cli_command(arguments)):
+        return TOOL_CACHE_TTL_AWS_READ
+    return None
+
+
+def _is_error_result(result: Any) -> bool:
+    """Return True for results that report a failed call in their content instead of raising."""
+    if not isinstance(result, str):
+        return False
+    head = result[:200].lstrip()
+    return head.startswith(("Error", "❌")) or '"error": true' in head or '"error":true' in head
+
+
 async def request_user_consent(operation: str, details: str) -> bool:
     """
     Request user consent via Chainlit without blocking the agent flow.
@@ -23,7 +102,7 @@ async def request_user_consent(operation: str, details: str) -> bool:
     Returns:
         bool: True if user consents, False otherwise
     """
-    logger.info(f"🔐 Requesting consent for operation: {operation}")
+    logger.info("🔐 Requesting consent for operation: {}", operation)
     
     try:
         # Use AskUserMessage for simple yes/no
@@ -36,13 +115,13 @@ async def request_user_consent(operation: str, details: str) -> bool:
             user_response = res.get("output", "").strip().lower()
             
             if user_response in ["yes", "y", "approve", "ok"]:
-                logger.info(f"✅ User approved operation: {operation}")
+                logger.info("✅ User approved operation: {}", operation)
                 return True
             else:
-                logger.info(f"❌ User denied operation: {operation}")
+                logger.info("❌ User denied operation: {}", operation)
                 return False
         else:
-            logger.warning(f"⏱️ Timeout waiting for consent: {operation}")
+            logger.warning("⏱️ Timeout waiting for consent: {}", operation)
             return False
             
     except Exception as e:
@@ -50,6 +129,65 @@ async def request_user_consent(operation: str, details: str) -> bool:
         return False
 
 
+# Operation verbs, i.e. the first word of the AWS CLI operation name
+# ("describe" for "ec2 describe-instances", "ls" for "s3 ls"). Only these
+# run without consent; every other verb is treated as a mutation.
+_READONLY_VERBS = frozenset({
+    "describe", "list", "get", "show", "head", "ls",
+    "wait", "filter", "lookup", "search", "scan", "query",
+})
+
+# AWS CLI global options that take no value; every other option is
+# assumed to be followed by its value ("--region us-east-1")
+_AWS_CLI_FLAGS = frozenset({
+    "--debug", "--no-verify-ssl", "--no-paginate", "--no-sign-request",
+    "--no-cli-pager", "--cli-auto-prompt", "--no-cli-auto-prompt",
+})
+
+def aws_cli_verb(cli_command: str) -> str:
+    """
+    Return the lowercased operation verb of an AWS CLI command, or "" if there is none.
+    
+    The command is tokenized with shell quoting rules, so a quoted option
+    value can't pose as the service or operation, and global options before
+    the service ("aws --region us-east-1 ec2 ...") are skipped. A command
+    with unbalanced quoting yields "", which callers treat as needing consent.
+    """
+    try:
+        tokens = iter(shlex.split(cli_command))
+    except ValueError:
+        logger.debug("🔍 Could not tokenize CLI command: {}", cli_command[:120])
+        return ""
+
+    positional = []
+    for token in tokens:
+        if token.startswith("-"):
+            if "=" not in token and token not in _AWS_CLI_FLAGS:
+                next(tokens, None)
+            continue
+        if not positional and token.lower() == "aws":
+            continue
+        positional.append(token)
+        if len(positional) == 2:
+            return token.lower().split("-", 1)[0]
+    return ""
+
+
+def aws_cli_command(arguments: dict) -> str:
+    """Return the CLI command passed to call_aws, whichever parameter name carries it."""
+    return (
+        arguments.get("cli_command", "") or 
+        arguments.get("command", "") or
+        arguments.get("aws_command", "") or
+        ""
+    )
+
+
+def is_readonly_aws_command(cli_command: str) -> bool:
+    """Return True if the AWS CLI command only reads state and needs no consent."""
+    return aws_cli_verb(cli_command) in _READONLY_VERBS
+
+
 def is_mutation_operation(tool_name: str, arguments: dict) -> tuple[bool, str]:
     """
     Check if a tool operation is a mutation (write/modify operation).
@@ -61,53 +199,24 @@ def is_mutation_operation(tool_name: str, arguments: dict) -> tuple[bool, str]:
     Returns:
         tuple: (is_mutation: bool, operation_description: str)
     """
-    logger.info(f"🔍 Checking mutation for tool: {tool_name}")
-    logger.info(f"🔍 Tool arguments: {arguments}")
+    # Only the AWS API MCP tool can mutate infrastructure
+    if tool_name != "call_aws":
+        return False, ""
     
-    # AWS API MCP tool
-    if tool_name == "call_aws":
-        # Try multiple possible parameter names
-        cli_command = (
-            arguments.get("cli_command", "") or 
-            arguments.get("command", "") or
-            arguments.get("aws_command", "") or
-            ""
-        )
-        
-        logger.info(f"🔍 Extracted CLI command: {cli_command}")
-        
-        cli_lower = cli_command.lower()
-        
-        # IMPORTANT: Check read-only operations FIRST
-        readonly_keywords = [
-            "describe", "list", "get", "show", "head"
-        ]
-        
-        for keyword in readonly_keywords:
-            if keyword in cli_lower:
-                logger.info(f"🟢 Read-only operation detected (keyword: {keyword})")
-                return False, ""
-        
-        # Then check for mutation keywords
-        mutation_keywords = [
-            "create", "delete", "modify", "update", "put", "terminate",
-            "stop", "start", "reboot", "attach", "detach", "associate",
-            "disassociate", "enable", "disable", "configure", "run",
-            "allocate", "release", "copy", "import", "export"
-        ]
-        
-        for keyword in mutation_keywords:
-            if keyword in cli_lower:
-                logger.info(f"🔴 Mutation operation detected (keyword: {keyword})")
-                return True, cli_command
-        
-        # Default: assume read-only if no mutation keyword found
-        logger.info(f"🟢 No mutation keywords found, treating as read-only")
+    logger.debug("🔍 Tool arguments: {}", arguments)
+    
+    cli_command = aws_cli_command(arguments)
+    verb = aws_cli_verb(cli_command)
+    
+    logger.debug("🔍 Extracted CLI command: {}", cli_command)
+    
+    if verb in _READONLY_VERBS:
+        logger.debug("🟢 Read-only operation detected (verb: {})", verb)
         return False, ""
     
-    # For other tools, default to no consent needed
-    logger.info(f"🟢 Non-AWS API tool ({tool_name}), no consent needed")
-    return False, ""
+    # Anything not known to be read-only needs consent
+    logger.debug("🔴 Mutation operation assumed (verb: {!r})", verb)
+    return True, cli_command
 
 
 def wrap_mcp_tools(mcp_tools: list) -> list:
@@ -132,22 +241,38 @@ def wrap_mcp_tools(mcp_tools: list) -> list:
             
             # Check if this is a mutation operation
             is_mutation, operation_desc = is_mutation_operation(t_name, kwargs)
+
+            # Reuse a recent result for repeated read-only calls
+            ttl = None if is_mutation else tool_cache_ttl(t_name, kwargs)
+            if ttl is not None:
+                cache_key = (
+                    t_name, orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS, default=str)
+                )
+                hit, cached = _tool_cache.get(cache_key)
+                if hit:
+                    logger.info("♻️ Tool {} served from cache", t_name)
+                    return cached
             
             if is_mutation:
-                logger.info(f"🔐 Mutation detected for {t_name}: {operation_desc}")
+                logger.info("🔐 Mutation detected for {}: {}", t_name, operation_desc)
                 
                 # Request consent
                 consent_granted = await request_user_consent(t_name, operation_desc)
                 
                 if not consent_granted:
                     error_msg = f"Operation '{operation_desc}' was denied by user"
-                    logger.warning(f"❌ {error_msg}")
+                    logger.warning("❌ {}", error_msg)
                     return f"❌ {error_msg}. The operation was cancelled and no changes were made to AWS infrastructure."
             
             # Execute the original tool
             try:
                 result = await original_t.ainvoke(kwargs)
-                logger.info(f"✅ Tool {t_name} executed successfully")
+                logger.info("✅ Tool {} executed successfully", t_name)
+                if is_mutation:
+                    # Cached reads may describe the state this call just changed
+                    _tool_cache.clear()
+                elif ttl is not None and not _is_error_result(result):
+                    _tool_cache.set(cache_key, result, ttl)
                 return result
             except Exception as e:
                 error_msg = str(e)
@@ -168,7 +293,7 @@ def wrap_mcp_tools(mcp_tools: list) -> list:
         )
         
         wrapped_tools.append(wrapped_tool)
-        logger.debug(f"✅ Wrapped tool: {tool_name}")
+        logger.debug("✅ Wrapped tool: {}", tool_name)
     
-    logger.info(f"✅ Wrapped {len(wrapped_tools)} MCP tools with consent management")
+    logger.info("✅ Wrapped {} MCP tools with consent management", len(wrapped_tools))
     return wrapped_tools
@@ -31,7 +31,7 @@ async def stream_to_chainlit(
     Yields:
         Text chunks to be streamed to Chainlit
     """
-    logger.info(f"🔄 Starting agent stream for message: {user_message[:50]}...")
+    logger.info("🔄 Starting agent stream for message: {}...", user_message[:50])
     
     output_token_count = 0
     input_token_count = 0
@@ -129,7 +129,7 @@ async def stream_to_chainlit(
         
         # If no tokens streamed but we have a final message
         if output_token_count == 0 and last_message and last_message.content:
-            logger.warning(f"⚠️ No tokens streamed, yielding final message...")
+            logger.warning("⚠️ No tokens streamed, yielding final message...")
             
             if isinstance(last_message.content, str):
                 yield last_message.content
@@ -153,18 +153,20 @@ async def stream_to_chainlit(
         output_cost = (output_token_count / 1000) * PRICE_OUTPUT_PER_1K
         total_cost = input_cost + output_cost
         
-        # Log token usage and cost
-        logger.info("=" * 50)
-        logger.info("📊 TOKEN USAGE & COST")
-        logger.info("=" * 50)
-        logger.info(f"   Input tokens:  {input_token_count:,}")
-        logger.info(f"   Output tokens: {output_token_count:,}")
-        logger.info(f"   Total tokens:  {input_token_count + output_token_count:,}")
-        logger.info("-" * 50)
-        logger.info(f"   Input cost:    ${input_cost:.6f}")
-        logger.info(f"   Output cost:   ${output_cost:.6f}")
-        logger.info(f"   💰 TOTAL COST: ${total_cost:.6f}")
-        logger.info("=" * 50)
+        # Log token usage and cost as one block, once per turn
+        logger.info("\n".join([
+            "=" * 50,
+            "📊 TOKEN USAGE & COST",
+            "=" * 50,
+            f"   Input tokens:  {input_token_count:,}",
+            f"   Output tokens: {output_token_count:,}",
+            f"   Total tokens:  {input_token_count + output_token_count:,}",
+            "-" * 50,
+            f"   Input cost:    ${input_cost:.6f}",
+            f"   Output cost:   ${output_cost:.6f}",
+            f"   💰 TOTAL COST: ${total_cost:.6f}",
+            "=" * 50,
+        ]))
         
     except Exception as e:
         logger.exception(f"❌ Error during streaming: {str(e)}")
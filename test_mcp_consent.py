@@ -0,0 +1,73 @@
+import pytest
+
+from src.utils.mcp_tools_wrapper import aws_cli_verb, is_mutation_operation
+
+
+MUTATIONS = [
+    "aws ec2 terminate-instances --instance-ids i-123",
+    "aws --region us-east-1 ec2 terminate-instances --instance-ids i-123",
+    "aws --profile prod ec2 stop-instances --instance-ids i-123",
+    "aws --region=us-east-1 --debug ec2 stop-instances --instance-ids i-123",
+    "aws --output json --no-cli-pager s3 rm s3://bucket/key",
+    "aws ec2 create-tags --resources i-123 --tags Key=targets,Value=list",
+    "aws ec2 authorize-security-group-ingress --group-id sg-1 --port 22",
+    "aws ec2 revoke-security-group-egress --group-id sg-1",
+    "aws autoscaling set-desired-capacity --auto-scaling-group-name g --desired-capacity 0",
+    "aws iam add-user-to-group --user-name u --group-name admins",
+    "aws iam remove-user-from-group --user-name u --group-name admins",
+    "aws lambda invoke --function-name f out.json",
+    "aws sqs send-message --queue-url q --message-body hi",
+    "aws ec2 reset-image-attribute --image-id ami-1 --attribute launchPermission",
+    "aws ec2 replace-route --route-table-id rtb-1",
+    "aws ec2 cancel-spot-instance-requests --spot-instance-request-ids r-1",
+    "aws resourcegroupstaggingapi tag-resources --resource-arn-list a --tags k=v",
+    "aws ecs register-task-definition --family f",
+    "aws elbv2 deregister-targets --target-group-arn t",
+    "aws s3 cp file.txt s3://bucket/",
+    'aws --output "text ec2 describe-x" ec2 terminate-instances --instance-ids i-1',
+    "aws --query 'ec2 describe-x' ec2 terminate-instances --instance-ids i-1",
+    'aws ec2 describe-instances --filters "Name=x',
+    "aws",
+    "",
+]
+
+READ_ONLY = [
+    "aws ec2 describe-instances --filters Name=tag:Name,Values=delete-me",
+    "aws --region us-east-1 ec2 describe-instances",
+    "aws --profile prod --output table ce get-cost-and-usage --granularity MONTHLY",
+    "aws s3 ls s3://bucket",
+    "aws s3api head-object --bucket b --key k",
+    "ec2 describe-volumes",
+    'aws --query "Reservations[].Instances[][InstanceId, State]" ec2 describe-instances',
+    "aws --output json ec2 describe-instances --query 'Reservations[*] # tagged'",
+]
+
+
+@pytest.mark.parametrize("command", MUTATIONS)
+def test_mutations_require_consent(command):
+    assert is_mutation_operation("call_aws", {"cli_command": command}) == (True, command)
+    assert is_mutation_operation("call_aws", {"command": command})[0] is True
+
+
+@pytest.mark.parametrize("command", READ_ONLY)
+def test_read_only_commands_skip_consent(command):
+    assert is_mutation_operation("call_aws", {"cli_command": command}) == (False, "")
+    assert is_mutation_operation("call_aws", {"aws_command": command})[0] is False
+
+
+def test_global_options_are_skipped_before_the_service():
+    assert aws_cli_verb("aws --region us-east-1 ec2 terminate-instances") == "terminate"
+    assert aws_cli_verb("aws --profile prod ec2 stop-instances") == "stop"
+    assert aws_cli_verb("aws --no-paginate ec2 describe-instances") == "describe"
+
+
+def test_quoted_option_values_cannot_pose_as_the_operation():
+    command = 'aws --output "text ec2 describe-x" ec2 terminate-instances --instance-ids i-1'
+    assert aws_cli_verb(command) == "terminate"
+    assert aws_cli_verb('aws --query "[InstanceId, State]" ec2 describe-instances') == "describe"
+    assert aws_cli_verb('aws --output "text ec2 describe-x') == ""
+
+
+def test_other_tools_never_need_consent():
+    assert is_mutation_operation("get_cost_and_usage", {"command": "delete"}) == (False, "")
+    assert is_mutation_operation("generate_image", {}) == (False, "")
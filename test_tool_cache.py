@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import mcp_tools_wrapper
+from src.utils.mcp_tools_wrapper import (
+    TOOL_CACHE_TTL_AWS_READ,
+    TOOL_CACHE_TTL_COST,
+    ToolResultCache,
+    tool_cache_ttl,
+    wrap_mcp_tools,
+)
+
+
+class FakeTool:
+    def __init__(self, name):
+        self.name = name
+        self.description = f"{name} tool"
+        self.args_schema = None
+        self.calls = 0
+
+    async def ainvoke(self, kwargs):
+        self.calls += 1
+        return f"result {self.calls}"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(mcp_tools_wrapper.time, "monotonic", lambda: now.value)
+    mcp_tools_wrapper._tool_cache.clear()
+    yield now
+    mcp_tools_wrapper._tool_cache.clear()
+
+
+def call_twice(tool, **kwargs):
+    wrapped = wrap_mcp_tools([tool])[0]
+
+    async def run():
+        return await wrapped.coroutine(**kwargs), await wrapped.coroutine(**kwargs)
+
+    return asyncio.run(run())
+
+
+def test_ttl_only_for_cost_tools_and_read_only_aws_commands():
+    assert tool_cache_ttl("get_cost_and_usage", {}) == TOOL_CACHE_TTL_COST
+    read = {"cli_command": "aws ec2 describe-instances"}
+    assert tool_cache_ttl("call_aws", read) == TOOL_CACHE_TTL_AWS_READ
+    writes = ["aws lambda invoke --function-name f", "aws ec2 authorize-security-group-ingress"]
+    for command in writes:
+        assert tool_cache_ttl("call_aws", {"cli_command": command}) is None
+    assert tool_cache_ttl("call_aws", {}) is None
+    assert tool_cache_ttl("other_tool", {}) is None
+
+
+def test_cache_expires_after_ttl(clock):
+    cache = ToolResultCache()
+    cache.set(("k",), "v", ttl=10)
+    assert cache.get(("k",)) == (True, "v")
+    clock.value += 11
+    assert cache.get(("k",)) == (False, None)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ToolResultCache(maxsize=2)
+    cache.set(("a",), 1, ttl=60)
+    cache.set(("b",), 2, ttl=60)
+    cache.get(("a",))
+    cache.set(("c",), 3, ttl=60)
+    assert cache.get(("b",)) == (False, None)
+    assert cache.get(("a",)) == (True, 1)
+
+
+def test_repeated_read_only_call_is_served_from_cache(clock):
+    tool = FakeTool("call_aws")
+    assert call_twice(tool, cli_command="aws ec2 describe-instances") == ("result 1", "result 1")
+    assert tool.calls == 1
+
+
+def test_repeated_unknown_verb_always_runs(clock, monkeypatch):
+    async def approve(operation, details):
+        return True
+
+    monkeypatch.setattr(mcp_tools_wrapper, "request_user_consent", approve)
+    tool = FakeTool("call_aws")
+    command = "aws autoscaling set-desired-capacity --auto-scaling-group-name g"
+    assert call_twice(tool, cli_command=command) == ("result 1", "result 2")
+    assert tool.calls == 2
+
+
+def test_approved_mutation_clears_cached_reads(clock, monkeypatch):
+    async def approve(operation, details):
+        return True
+
+    monkeypatch.setattr(mcp_tools_wrapper, "request_user_consent", approve)
+    tool = FakeTool("call_aws")
+    wrapped = wrap_mcp_tools([tool])[0]
+
+    async def run():
+        describe = "aws ec2 describe-instances"
+        before = await wrapped.coroutine(cli_command=describe)
+        await wrapped.coroutine(cli_command="aws ec2 stop-instances --instance-ids i-1")
+        return before, await wrapped.coroutine(cli_command=describe)
+
+    assert asyncio.run(run()) == ("result 1", "result 3")
+    assert tool.calls == 3
+
+
+def test_error_results_are_not_cached(clock):
+    class FailingTool(FakeTool):
+        async def ainvoke(self, kwargs):
+            self.calls += 1
+            return '{"error": true, "detail": "throttled"}'
+
+    tool = FailingTool("call_aws")
+    call_twice(tool, cli_command="aws ec2 describe-instances")
+    assert tool.calls == 2